@@ -1,26 +1,53 @@
 from manim import *
+from hexgrid import hexagon_normals, within_hexagon, switch_basis, project_2_to_3
+from inplace import ParametricBrace, dot_updater, line_updater, move_line
+from section_cache import CachedSectionScene
+from tex_cache import install_tex_cache
 import math
 
+install_tex_cache()
+
+
+class AdvancedHexagon(CachedSectionScene):
+    cached_sections = (
+        'add_outer_hexagon',
+        'define_q',
+        'eqn_radius_in_q',
+        'geometrical_radius_in_q',
+        'define_basis',
+        'calculate_corners_in_basis',
+        'transform_hexagon_in_basis',
+        'show_transformed_normals',
+        'show_transformed_contains',
+    )
 
-class AdvancedHexagon(Scene):
     def construct(self):
         self.radius = 3
 
+        self.cached_section('add_outer_hexagon')
         outer_hexagon = self.add_outer_hexagon()
+        self.cached_section('define_q')
         (q_hex, q_brace, q_tex, q_tracker, r_tracker, updaters) = self.define_q()
+        self.cached_section('eqn_radius_in_q')
         q_eqn_tex = self.eqn_radius_in_q()
+        self.cached_section('geometrical_radius_in_q')
         self.geometrical_radius_in_q(q_hex, q_tracker)
         self.play(q_tracker.animate.set_value(6))
         self.geometrical_radius_in_q(q_hex, q_tracker)
+        self.cached_section('define_basis')
         self.define_basis(q_tracker)
         for mobj, upd in updaters:
             mobj.remove_updater(upd)
         q_hex.remove_updaters()
         self.play(ShrinkToCenter(q_brace), ShrinkToCenter(q_tex), ShrinkToCenter(q_eqn_tex))
+        self.cached_section('calculate_corners_in_basis')
         self.calculate_corners_in_basis(outer_hexagon)
         self.play(*[ShrinkToCenter(mobj) for mobj in q_hex.children()])
+        self.cached_section('transform_hexagon_in_basis')
         self.transform_hexagon_in_basis(outer_hexagon, q_tracker)
+        self.cached_section('show_transformed_normals')
         self.show_transformed_normals(outer_hexagon)
+        self.cached_section('show_transformed_contains')
         self.show_transformed_contains(outer_hexagon)
         # self.transform_back(outer_hexagon)
 
@@ -37,19 +64,16 @@ class AdvancedHexagon(Scene):
 
         self.play(*[Create(mobj) for mobj in hex.children()])
 
-        brace = Brace(hex.lines[1], direction=UP)
+        brace = ParametricBrace(hex.lines[1], direction=UP)
         tex = MathTex(r'\frac{1}{q}r').scale(0.75)
         brace.put_at_tip(tex)
 
         self.play(GrowFromCenter(brace), GrowFromCenter(tex))
 
         def brace_updater(x):
-            return x.become(Brace(hex.lines[1], direction=UP))
+            return x.follow(hex.lines[1], UP)
 
-        def tex_updater(x):
-            cp_x = x.copy()
-            brace.put_at_tip(cp_x)
-            return x.become(cp_x)
+        tex_updater = brace.label_updater()
 
         hex.add_updaters(radius_tracker)
         brace.add_updater(brace_updater)
@@ -66,7 +90,7 @@ class AdvancedHexagon(Scene):
         self.wait()
 
         def brace_updater(x):
-            return x.become(Brace(hex.lines[-2], direction=DOWN))
+            return x.follow(hex.lines[-2], DOWN)
 
         brace.add_updater(brace_updater)
 
@@ -88,7 +112,7 @@ class AdvancedHexagon(Scene):
         inner_height = inner_radius * (math.sqrt(3) / 2)
         q = int(q_tracker.get_value())
 
-        brace = Brace(c_hex.lines[2], direction=LEFT)
+        brace = ParametricBrace(c_hex.lines[2], direction=LEFT)
         brace_tex = MathTex(r'\frac{\sqrt{3}}{2}\frac{1}{q}r').scale(0.75)
         brace.put_at_tip(brace_tex)
         self.play(GrowFromCenter(brace), GrowFromCenter(brace_tex))
@@ -109,13 +133,10 @@ class AdvancedHexagon(Scene):
 
         y_shift_tracker = ValueTracker(0)
         def brace_updater(x):
-            tmp_line = Line([-inner_radius, inner_height + y_shift_tracker.get_value(), 0], [-inner_radius, -inner_height + y_shift_tracker.get_value(), 0])
-            return x.become(Brace(tmp_line, direction=LEFT))
+            y_shift = y_shift_tracker.get_value()
+            return x.put_along([-inner_radius, inner_height + y_shift, 0], [-inner_radius, -inner_height + y_shift, 0], LEFT)
 
-        def brace_tex_updater(x):
-            cp_x = x.copy()
-            brace.put_at_tip(cp_x)
-            return x.become(cp_x)
+        brace_tex_updater = brace.label_updater()
 
         brace.add_updater(brace_updater)
         brace_tex.add_updater(brace_tex_updater)
@@ -198,13 +219,12 @@ class AdvancedHexagon(Scene):
         px_tracker = ValueTracker(p[0])
         py_tracker = ValueTracker(p[1])
 
-        def p_dot_updater(x):
-            p = np.array((px_tracker.get_value(), py_tracker.get_value(), 0))
-            return x.become(Dot(p))
+        p_dot_updater = dot_updater(lambda: (px_tracker.get_value(), py_tracker.get_value(), 0))
 
         def p_tex_updater(x):
             p = np.array((px_tracker.get_value(), py_tracker.get_value(), 0))
-            return x.become(x.copy().next_to(Dot(p), RIGHT))
+            # next to where a Dot at p would end, without building one
+            return x.next_to(p + DEFAULT_DOT_RADIUS * RIGHT, RIGHT)
 
         def t_arrow_updater(x):
             p = np.array((px_tracker.get_value(), py_tracker.get_value(), 0))
@@ -551,23 +571,18 @@ class AdvancedHexagon(Scene):
             tex_finish = tex_ends[idx]
             tex_delta = tex_finish - tex_initial
 
-            def dot_updater(x):
-                return x.become(Dot(project_2_to_3(line_start_initial + line_start_delta * alpha.get_value())))
+            def line_start():
+                return project_2_to_3(line_start_initial + line_start_delta * alpha.get_value())
 
-            def line_updater(x):
-                return x.become(
-                    Line(
-                        project_2_to_3(line_start_initial + line_start_delta * alpha.get_value()),
-                        project_2_to_3(line_end_initial + line_end_delta * alpha.get_value())
-                    )
-                )
+            def line_end():
+                return project_2_to_3(line_end_initial + line_end_delta * alpha.get_value())
 
             def tex_updater(x):
-                return x.become(x.copy().move_to(tex_initial + tex_delta * alpha.get_value()))
+                return x.move_to(tex_initial + tex_delta * alpha.get_value())
 
             return [
-                (outer_hexagon.dots[idx], dot_updater),
-                (outer_hexagon.lines[idx], line_updater),
+                (outer_hexagon.dots[idx], dot_updater(line_start)),
+                (outer_hexagon.lines[idx], line_updater(lambda: (line_start(), line_end()))),
                 (outer_hexagon.texs[idx], tex_updater)
             ]
 
@@ -711,51 +726,49 @@ class AdvancedHexagon(Scene):
             self.play(ShrinkToCenter(tex), FadeOut(arrow), ShrinkToCenter(dot), ShrinkToCenter(dot_tex))
 
     def show_transformed_contains(self, outer_hexagon):
-        line_centers = []
-        normal_vs = []
-        for idx in range(6):
-            start = outer_hexagon.dots[idx].get_center()
-            end = outer_hexagon.dots[(idx + 1) % 6].get_center()
-            halfway = (start + end) / 2
-            unit_v = end - start
-            unit_v /= np.linalg.norm(unit_v)
-            norm_v = np.cross(np.cross(unit_v, -halfway), unit_v)
-            norm_v /= np.linalg.norm(norm_v)
-            line_centers.append(halfway)
-            normal_vs.append(norm_v)
+        line_centers, normal_vs = hexagon_normals([dot.get_center() for dot in outer_hexagon.dots])
 
         px_tracker = ValueTracker(0)
         py_tracker = ValueTracker(0)
         arrows = []
-        arrow_updaters = []
-
-        def make_arrow(base, dir):
-            proj = np.dot(-base, dir) * dir
-            arrow = Arrow(base, base + proj, buff=0).set_color(GREEN)
-            def arrow_updater(x):
-                p = np.array((px_tracker.get_value(), py_tracker.get_value(), 0))
-                length = np.dot(p - base, dir)
-                proj = length * dir
-                return x.become(Arrow(base, base + proj, buff=0).set_color(GREEN if length >= 0 else RED))
-            return [arrow, arrow_updater]
 
         for base, dir in zip(line_centers, normal_vs):
-            a, upd = make_arrow(base, dir)
-            arrows.append(a)
-            arrow_updaters.append(upd)
-
+            proj = np.dot(-base, dir) * dir
+            arrows.append(Arrow(base, base + proj, buff=0).set_color(GREEN))
 
         p_dot = Dot(ORIGIN)
         self.play(GrowFromCenter(p_dot))
         self.play(*[FadeIn(a) for a in arrows])
         self.wait()
 
-        def p_dot_updater(x):
-            return x.become(Dot([px_tracker.get_value(), py_tracker.get_value(), 0]))
+        p_dot_updater = dot_updater(lambda: (px_tracker.get_value(), py_tracker.get_value(), 0))
+
+        # all six signed distances come out of one call per frame, the first
+        # arrow updater to run for a new p computes them for the rest
+        frame_dists = {'p': None, 'dists': None}
+
+        def signed_dists():
+            p = (px_tracker.get_value(), py_tracker.get_value(), 0)
+            if frame_dists['p'] != p:
+                frame_dists['p'] = p
+                frame_dists['dists'] = within_hexagon(np.array(p), line_centers, normal_vs)[1][0]
+            return frame_dists['dists']
+
+        def create_arrow_updater(idx):
+            base = line_centers[idx]
+            dir = normal_vs[idx]
+
+            def arrow_updater(x):
+                length = signed_dists()[idx]
+                return x.become(Arrow(base, base + length * dir, buff=0).set_color(GREEN if length >= 0 else RED))
+
+            return arrow_updater
+
+        arrow_updaters = [create_arrow_updater(idx) for idx in range(len(arrows))]
 
         p_dot.add_updater(p_dot_updater)
-        for a, upd in zip(arrows, arrow_updaters):
-            a.add_updater(upd)
+        for (arrow, updater) in zip(arrows, arrow_updaters):
+            arrow.add_updater(updater)
 
         for (s, t, w) in [[-1, 0, 1], [0, 1, 1], [0, 4, 1], [1, -3.5, 1], [3.5, 1.5, 1], [0, 0, 0], [-2, 0, 1], [-2.5, 0, 2], [2, 0, 1], [2.5, 0, 2], [0, 0, 1]]:
             self.play(px_tracker.animate.set_value(s), py_tracker.animate.set_value(t))
@@ -763,8 +776,8 @@ class AdvancedHexagon(Scene):
                 self.wait(w)
 
         p_dot.remove_updater(p_dot_updater)
-        for a, upd in zip(arrows, arrow_updaters):
-            a.remove_updater(upd)
+        for (arrow, updater) in zip(arrows, arrow_updaters):
+            arrow.remove_updater(updater)
 
         self.play(ShrinkToCenter(p_dot), *[FadeOut(a) for a in arrows])
 
@@ -839,10 +852,11 @@ class Hexagon:
             center_x = x_tracker.get_value()
             center_y = y_tracker.get_value()
             center_z = 0
-            return x.become(Line(
+            return move_line(
+                x,
                 (center_x + radius * math.cos(angle * DEGREES), center_y + radius * math.sin(angle * DEGREES), center_z),
                 (center_x + radius * math.cos((angle+60) * DEGREES), center_y + radius * math.sin((angle+60) * DEGREES), center_z)
-            ))
+            )
         return updater
 
 
@@ -914,19 +928,3 @@ class QToRadiusTracker:
     def get_value(self):
         return self.radius / self.q_tracker.get_value()
 
-
-# switch from p=(x, y) to (a, b) in the basis [s, t]
-def switch_basis(p, s, t):
-    # (x, y) = a(s1, s2) + b(t1, t2)
-    #
-    # |x| = |s1, t1| |a|
-    # |y|   |s2, t2| |b|
-    #
-    # X = BA
-    # B^-1 X = A
-
-    return np.linalg.inv(np.array([s[:2], t[:2]]).T) @ np.array(p[:2])
-
-
-def project_2_to_3(twod):
-    return np.array((twod[0], twod[1], 0))
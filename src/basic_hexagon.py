@@ -1,10 +1,14 @@
 from itertools import chain
 import itertools
 from manim import *
+from inplace import ParametricBrace, move_line
+from tex_cache import TexPrepassScene, install_tex_cache
 import math
 
+install_tex_cache()
 
-class BasicHexagon(Scene):
+
+class BasicHexagon(TexPrepassScene):
     def construct(self):
         radius = 3
 
@@ -55,9 +59,8 @@ class BasicHexagon(Scene):
         self.add(theta_line, theta_angle)
 
         def theta_line_updater(x):
-            return x.become(line.copy()).rotate(
-                theta_tracker.get_value() * DEGREES, about_point=ORIGIN
-            )
+            rads = theta_tracker.get_value() * DEGREES
+            return move_line(x, rotate_vector(line.get_start(), rads), rotate_vector(line.get_end(), rads))
 
         theta_line.add_updater(theta_line_updater)
 
@@ -275,7 +278,7 @@ class BasicHexagon(Scene):
         theta_line = Line(ORIGIN, [0, inner_hex_height, 0])
         self.play(Create(theta_line))
 
-        theta_brace = Brace(theta_line, direction=RIGHT)
+        theta_brace = ParametricBrace(theta_line, direction=RIGHT)
         self.play(GrowFromCenter(theta_brace))
 
         theta_tex = MathTex(r'\frac{\sqrt{3}}{2} \cdot \frac{1}{3}r')
@@ -290,16 +293,13 @@ class BasicHexagon(Scene):
         theta_tracker = ValueTracker(90)
         def theta_line_updater(x):
             rads = theta_tracker.get_value() * DEGREES
-            return x.become(Line(ORIGIN, [inner_hex_height * math.cos(rads), inner_hex_height * math.sin(rads), 0]))
+            return move_line(x, ORIGIN, [inner_hex_height * math.cos(rads), inner_hex_height * math.sin(rads), 0])
 
         def theta_brace_updater(x):
             rads = theta_tracker.get_value() * DEGREES
-            return x.become(Brace(theta_line, direction=[math.cos(rads - math.pi / 2), math.sin(rads - math.pi / 2), 0]))
+            return x.follow(theta_line, [math.cos(rads - math.pi / 2), math.sin(rads - math.pi / 2), 0])
 
-        def theta_tex_updater(x):
-            cp_x = x.copy()
-            theta_brace.put_at_tip(cp_x)
-            return x.become(cp_x)
+        theta_tex_updater = theta_brace.label_updater()
 
         theta_line.add_updater(theta_line_updater)
         theta_brace.add_updater(theta_brace_updater)
@@ -367,7 +367,7 @@ class BasicHexagon(Scene):
         self.wait()
 
         verify_line = Line(ORIGIN, [inner_hex_radius, 0, 0])
-        verify_brace = Brace(verify_line, direction=DOWN)
+        verify_brace = ParametricBrace(verify_line, direction=DOWN)
         verify_tex = MathTex(r'\frac{1}{3}r').scale(0.5)
         verify_brace.put_at_tip(verify_tex)
         verify_tex.shift([0, -0.5, 0])
@@ -382,16 +382,12 @@ class BasicHexagon(Scene):
         offset_tracker = ValueTracker(0)
         def verify_line_updater(x):
             v = offset_tracker.get_value()
-            return x.become(Line([v, 0, 0], [v+inner_hex_radius, 0, 0]))
+            return move_line(x, [v, 0, 0], [v+inner_hex_radius, 0, 0])
 
         def verify_brace_updater(x):
-            return x.become(Brace(verify_line, direction=DOWN))
+            return x.follow(verify_line)
 
-        def verify_tex_updater(x):
-            cp_x = x.copy()
-            verify_brace.put_at_tip(cp_x)
-            cp_x.shift([0, -0.5, 0])
-            return x.become(cp_x)
+        verify_tex_updater = verify_brace.label_updater([0, -0.5, 0])
 
         verify_line.add_updater(verify_line_updater)
         verify_brace.add_updater(verify_brace_updater)
@@ -0,0 +1,19 @@
+# The geometry and indexing behind the scenes, without depending on manim so
+# that it can be imported (and used by batch jobs) without pulling it in.
+from .geometry import (
+    BASIS, INV_BASIS, UNIT_CORNERS_ST,
+    hexagon_vertices, hexagon_normals, within_hexagon, clip_to_hexagon,
+    switch_basis, project_2_to_3
+)
+from .indexing import (
+    KTracker, TileStore, TILE_CORNERS_THIRDS, NEIGHBOR_OFFSETS,
+    column_bounds, column_offset, contains_tile, tile_count,
+    tile_index, tile_index_batch, tile_coords, tile_coords_batch,
+    tiling_columns, tiling_st_idxs, iter_tiles, iter_tile_chunks,
+    tile_vertices, neighbors, neighbors_batch, tiling_edges, tiling_diff, iter_tile_ranges,
+    column_vertex_bounds, column_boundary, tiling_boundary, tiling_outside_edges
+)
+from .locate import round_lattice, round_lattice_batch, locate_point, locate_points
+from .cache import TilingCache
+from .storage import write_tiling_file, TilingFile
+from .parallel import SharedTileStore
@@ -0,0 +1,49 @@
+from collections import OrderedDict
+
+from .indexing import TileStore
+
+
+# Keeps the most recently used tilings, keyed by (k, radius), for as long as
+# their arrays fit within max_bytes. A tiling which doesn't fit on its own is
+# still returned, just not kept.
+class TilingCache:
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.tilings = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, k: int, radius: float) -> TileStore:
+        key = (k, radius)
+        store = self.tilings.get(key)
+        if store is not None:
+            self.tilings.move_to_end(key)
+            self.hits += 1
+            return store
+
+        self.misses += 1
+        store = TileStore(k, radius)
+        # computed now so that it's part of the budget from the start
+        store.vertices
+        self.tilings[key] = store
+        self.nbytes += store.nbytes
+        self.evict()
+        return store
+
+    def evict(self):
+        while self.nbytes > self.max_bytes and self.tilings:
+            _, store = self.tilings.popitem(last=False)
+            self.nbytes -= store.nbytes
+
+    def clear(self):
+        self.tilings.clear()
+        self.nbytes = 0
+
+    def stats(self) -> dict:
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'tilings': len(self.tilings),
+            'nbytes': self.nbytes
+        }
@@ -0,0 +1,96 @@
+import math
+
+import numpy as np
+
+DEGREES = math.pi / 180
+
+BASIS = np.array([
+    [0, math.cos(30 * DEGREES)],
+    [1, math.sin(30 * DEGREES)]
+])
+INV_BASIS = np.linalg.inv(BASIS)
+# the six unit corners at 0, 60, ..., 300 degrees, already rebased into s/t
+UNIT_CORNERS_ST = np.array([
+    INV_BASIS @ np.array([math.cos(angle * DEGREES), math.sin(angle * DEGREES)])
+    for angle in range(0, 360, 60)
+])
+
+
+# centers is an (N, 2) array of hexagon centers in s/t space and radius is
+# the xy radius of every hexagon; returns the (N, 6, 3) s/t vertices. Since
+# the basis change is linear, INV_BASIS @ (BASIS @ c + r * corner) is just
+# c + r * (INV_BASIS @ corner), so there's no need to round-trip through xy.
+def hexagon_vertices(centers, radius):
+    centers = np.asarray(centers, dtype=float).reshape(-1, 2)
+    res = np.zeros((centers.shape[0], 6, 3))
+    res[:, :, :2] = centers[:, np.newaxis, :] + radius * UNIT_CORNERS_ST
+    return res
+
+
+# vertices are the six corners of a hexagon around the origin in order;
+# returns the (6, 3) edge midpoints and the (6, 3) unit normals of each edge,
+# pointing inward (i.e., towards the origin)
+def hexagon_normals(vertices):
+    starts = np.asarray(vertices, dtype=float)
+    ends = np.roll(starts, -1, axis=0)
+
+    halfways = (starts + ends) / 2
+    unit_vs = ends - starts
+    unit_vs /= np.linalg.norm(unit_vs, axis=1, keepdims=True)
+
+    norm_vs = np.cross(np.cross(unit_vs, -halfways), unit_vs)
+    norm_vs /= np.linalg.norm(norm_vs, axis=1, keepdims=True)
+
+    return (halfways, norm_vs)
+
+
+# points is an (M, 3) array; returns the (M,) mask of points which are not
+# more than tolerance outside of any edge, along with the (M, 6) signed
+# distances from each edge (positive is inside)
+def within_hexagon(points, halfways, normals, tolerance=1e-6):
+    points = np.asarray(points, dtype=float).reshape(-1, 3)
+    dists = points @ normals.T - np.einsum('ij,ij->i', halfways, normals)
+    return ((dists >= -tolerance).all(axis=1), dists)
+
+
+# Clips the segments from starts to ends, (M, 3) arrays, to the hexagon with
+# the given edges (see within_hexagon); each edge only keeps the part of a
+# segment on its inner side, which is a range of the segment's parameter
+# since the signed distances are linear along it. Returns the clipped starts
+# and ends along with the (M,) mask of segments which have anything left.
+def clip_to_hexagon(starts, ends, halfways, normals, tolerance=1e-6):
+    starts = np.asarray(starts, dtype=float).reshape(-1, 3)
+    ends = np.asarray(ends, dtype=float).reshape(-1, 3)
+    start_dists = within_hexagon(starts, halfways, normals)[1]
+    end_dists = within_hexagon(ends, halfways, normals)[1]
+
+    # ends within tolerance of an edge count as on it, and segments cut down
+    # to no more than tolerance long (e.g. touching a corner) are dropped
+    denoms = start_dists - end_dists
+    crossings = np.divide(start_dists, denoms, out=np.zeros_like(denoms), where=denoms != 0)
+    t0 = np.where(start_dists < -tolerance, crossings, 0).max(axis=1)
+    t1 = np.where(end_dists < -tolerance, crossings, 1).min(axis=1)
+
+    deltas = ends - starts
+    kept = (
+        ~((start_dists < -tolerance) & (end_dists < -tolerance)).any(axis=1)
+        & ((t1 - t0) * np.linalg.norm(deltas, axis=1) > tolerance)
+    )
+    return (starts + t0[:, np.newaxis] * deltas, starts + t1[:, np.newaxis] * deltas, kept)
+
+
+# switch from p=(x, y) to (a, b) in the basis [s, t]
+def switch_basis(p, s, t):
+    # (x, y) = a(s1, s2) + b(t1, t2)
+    #
+    # |x| = |s1, t1| |a|
+    # |y|   |s2, t2| |b|
+    #
+    # X = BA
+    # B^-1 X = A
+
+    return np.linalg.inv(np.array([s[:2], t[:2]]).T) @ np.array(p[:2])
+
+
+def project_2_to_3(twod):
+    return np.array((twod[0], twod[1], 0))
@@ -0,0 +1,408 @@
+import math
+
+import numpy as np
+
+from .geometry import clip_to_hexagon, hexagon_normals, hexagon_vertices, within_hexagon
+
+
+# k for the q = 6k tiling of the outer hexagon with the given radius, along
+# with everything that depends on it
+class KTracker:
+    def __init__(self, radius, initial_value=1):
+        self.radius = radius
+        self.canonical_outer_normals = hexagon_normals(hexagon_vertices((0, 0), self.radius)[0])
+        self.k = initial_value
+
+    def within_outer_hexagon(self, points):
+        return within_hexagon(points, *self.canonical_outer_normals)
+
+    def clip_to_outer_hexagon(self, starts, ends):
+        return clip_to_hexagon(starts, ends, *self.canonical_outer_normals)
+
+    def get_value(self) -> float:
+        return self.k
+
+    def set_value(self, value):
+        self.k = value
+
+    def get_k(self) -> float:
+        return self.get_value()
+
+    def get_q(self) -> float:
+        return self.get_k() * 6
+
+    def get_inner_radius(self) -> float:
+        return self.radius / self.get_q()
+
+    def get_inner_height(self) -> float:
+        return (math.sqrt(3)/2) * self.get_inner_radius()
+
+    def get_L(self) -> float:
+        return math.sqrt(3) * self.get_inner_radius()
+
+    # the (N, 6, 3) vertices of the tiles st_idxs for the current, possibly
+    # fractional, k in one call
+    def tile_vertices(self, st_idxs):
+        return hexagon_vertices(np.asarray(st_idxs) * self.get_L(), self.get_inner_radius())
+
+
+# Every tile of one tiling as NumPy columns, row i being the tile with index
+# i. The vertices are only computed once asked for.
+class TileStore:
+    __slots__ = ('k', 'radius', 'st_idxs', 'outside', '_vertices')
+
+    def __init__(self, k: int, radius: float):
+        self.k = k
+        self.radius = radius
+        self.st_idxs = tiling_st_idxs(k)
+        self.outside = tiling_outside_edges(k)
+        self._vertices = None
+
+    def __len__(self) -> int:
+        return self.st_idxs.shape[0]
+
+    @property
+    def s_idxs(self):
+        return self.st_idxs[:, 0]
+
+    @property
+    def t_idxs(self):
+        return self.st_idxs[:, 1]
+
+    @property
+    def indexes(self):
+        return np.arange(len(self))
+
+    @property
+    def boundary(self):
+        return self.outside.any(axis=1)
+
+    @property
+    def inner_radius(self) -> float:
+        return self.radius / (6 * self.k)
+
+    @property
+    def vertices(self):
+        if self._vertices is None:
+            self._vertices = tile_vertices(self.st_idxs, self.inner_radius)
+        return self._vertices
+
+    @property
+    def nbytes(self) -> int:
+        res = self.st_idxs.nbytes + self.outside.nbytes
+        if self._vertices is not None:
+            res += self._vertices.nbytes
+        return res
+
+    def index_of(self, s_idx: int, t_idx: int) -> int:
+        return tile_index(s_idx, t_idx, self.k)
+
+
+# The tiles are counted column by column (increasing s_idx), and within a
+# column from the bottom up (increasing t_idx), exactly like QEvenIndexer
+# draws them. All of these work in lattice units (multiples of L) for q = 6k,
+# so every bound below is just the corresponding TransformedHexagonMath line
+# divided by L, in exact integer arithmetic. Only tile_vertices multiplies by
+# L.
+
+def column_bounds(s_idx: int, k: int) -> tuple:
+    q = 6 * k
+    if s_idx <= -2 * k:
+        # below(s) = -qL - 2s, above(s) = qL + s
+        return (-q - 2 * s_idx, q + s_idx)
+    if s_idx <= 2 * k:
+        # below(s) = -(qL + s) / 2, above(s) = (qL - s) / 2, toward zero
+        return (-((q + s_idx) // 2), (q - s_idx) // 2)
+    # below(s) = -qL + s, above(s) = qL - 2s
+    return (-q + s_idx, q - 2 * s_idx)
+
+
+def tile_count(k: int) -> int:
+    return 36 * k * k + 6 * k + 1
+
+
+# column_bounds for every column at once; returns the s_idx, bottom t_idx and
+# top t_idx of each column as int64 arrays
+def tiling_columns(k: int):
+    q = 6 * k
+    s_idxs = np.arange(-4 * k, 4 * k + 1, dtype=np.int64)
+    left = s_idxs <= -2 * k
+    right = s_idxs > 2 * k
+
+    bots = -((q + s_idxs) // 2)
+    bots[left] = -q - 2 * s_idxs[left]
+    bots[right] = -q + s_idxs[right]
+
+    tops = (q - s_idxs) // 2
+    tops[left] = q + s_idxs[left]
+    tops[right] = q - 2 * s_idxs[right]
+
+    return (s_idxs, bots, tops)
+
+
+# every (s_idx, t_idx) in the tiling as an (N, 2) int64 array, row i being the
+# tile with index i
+def tiling_st_idxs(k: int):
+    return next(iter_tile_chunks(k, tile_count(k)))[1]
+
+
+# yields every (s_idx, t_idx) in index order, one at a time
+def iter_tiles(k: int):
+    for s_idx in range(-4 * k, 4 * k + 1):
+        bot, top = column_bounds(s_idx, k)
+        for t_idx in range(bot, top + 1):
+            yield (s_idx, t_idx)
+
+
+# yields (start, st_idxs) where st_idxs is an (n, 2) int64 array of the tiles
+# with index start, start + 1, ..., with n at most chunk_size. Besides the
+# chunk itself only the O(q) column tables are held.
+def iter_tile_chunks(k: int, chunk_size: int = 1 << 20):
+    count = tile_count(k)
+    for start in range(0, count, chunk_size):
+        indexes = np.arange(start, min(start + chunk_size, count), dtype=np.int64)
+        yield (start, tile_coords_batch(indexes, k))
+
+
+def column_offset(s_idx: int, k: int) -> int:
+    # the number of tiles in the columns strictly left of s_idx
+    if s_idx <= -2 * k:
+        # column heights are 1, 4, 7, ... so the offsets are pentagonal
+        j = s_idx + 4 * k
+        return j * (3 * j - 1) // 2
+
+    # the tiling is symmetric under (s, t) -> (-s, -t)
+    if s_idx > 2 * k:
+        bot, top = column_bounds(-s_idx, k)
+        return tile_count(k) - column_offset(-s_idx, k) - (top - bot + 1)
+
+    # column heights alternate 6k, 6k + 1, 6k, ...
+    m = s_idx + 2 * k - 1
+    return (2 * k + 1) * (3 * k + 1) + 6 * k * m + m // 2
+
+
+def contains_tile(s_idx: int, t_idx: int, k: int) -> bool:
+    if not -4 * k <= s_idx <= 4 * k:
+        return False
+    bot, top = column_bounds(s_idx, k)
+    return bot <= t_idx <= top
+
+
+def tile_index(s_idx: int, t_idx: int, k: int) -> int:
+    if not -4 * k <= s_idx <= 4 * k:
+        raise ValueError(f's_idx={s_idx} is outside the tiling for k={k}')
+
+    bot, top = column_bounds(s_idx, k)
+    if not bot <= t_idx <= top:
+        raise ValueError(f't_idx={t_idx} is outside column s_idx={s_idx} for k={k}')
+
+    return column_offset(s_idx, k) + (t_idx - bot)
+
+
+# tile_index for an (M, 2) array of (s_idx, t_idx), giving -1 wherever the
+# tile isn't part of the tiling rather than raising
+def tile_index_batch(st_idxs, k: int):
+    st_idxs = np.asarray(st_idxs, dtype=np.int64).reshape(-1, 2)
+    s_idxs, bots, tops = tiling_columns(k)
+    heights = tops - bots + 1
+    starts = np.cumsum(heights) - heights
+
+    cols = st_idxs[:, 0] + 4 * k
+    valid = (cols >= 0) & (cols < s_idxs.shape[0])
+    cols = np.where(valid, cols, 0)
+    t_idxs = st_idxs[:, 1]
+    valid &= (t_idxs >= bots[cols]) & (t_idxs <= tops[cols])
+
+    return np.where(valid, starts[cols] + t_idxs - bots[cols], -1)
+
+
+# tile_coords for an array of valid tile indices, returning an (M, 2) int64
+# array of (s_idx, t_idx)
+def tile_coords_batch(indexes, k: int):
+    indexes = np.asarray(indexes, dtype=np.int64).reshape(-1)
+    s_idxs, bots, tops = tiling_columns(k)
+    heights = tops - bots + 1
+    ends = np.cumsum(heights)
+    cols = np.searchsorted(ends, indexes, side='right')
+
+    res = np.empty((indexes.shape[0], 2), dtype=np.int64)
+    res[:, 0] = s_idxs[cols]
+    res[:, 1] = indexes - (ends[cols] - heights[cols]) + bots[cols]
+    return res
+
+
+def tile_coords(index: int, k: int) -> tuple:
+    count = tile_count(k)
+    if not 0 <= index < count:
+        raise IndexError(f'tile index {index} out of range for k={k}')
+
+    first_region = (2 * k + 1) * (3 * k + 1)
+    if index < first_region:
+        # largest j with j(3j - 1) / 2 <= index
+        j = (1 + math.isqrt(24 * index + 1)) // 6
+        s_idx = j - 4 * k
+        rem = index - j * (3 * j - 1) // 2
+    elif index < first_region + 24 * k * k + 2 * k:
+        pair, rem = divmod(index - first_region, 12 * k + 1)
+        m = 2 * pair
+        if rem >= 6 * k:
+            m += 1
+            rem -= 6 * k
+        s_idx = m - 2 * k + 1
+    else:
+        s_idx, t_idx = tile_coords(count - 1 - index, k)
+        return (-s_idx, -t_idx)
+
+    return (s_idx, column_bounds(s_idx, k)[0] + rem)
+
+
+# st_idxs is an (N, 2) array of (s_idx, t_idx) tile coordinates and radius is
+# the inner radius, so the tile centers are st_idxs * L; returns (N, 6, 3)
+def tile_vertices(st_idxs, radius):
+    return hexagon_vertices(np.asarray(st_idxs) * (math.sqrt(3) * radius), radius)
+
+
+# the (s_idx, t_idx) offsets to the neighbor sharing line idx of a tile
+NEIGHBOR_OFFSETS = ((0, 1), (1, 0), (1, -1), (0, -1), (-1, 0), (-1, 1))
+
+
+# the indices of the six neighbors of a tile, in the order of its lines, with
+# -1 for those which aren't part of the tiling
+def neighbors(index: int, k: int) -> tuple:
+    s_idx, t_idx = tile_coords(index, k)
+    return tuple(
+        tile_index(s_idx + ds, t_idx + dt, k) if contains_tile(s_idx + ds, t_idx + dt, k) else -1
+        for (ds, dt) in NEIGHBOR_OFFSETS
+    )
+
+
+# neighbors for an array of M tile indices, as an (M, 6) int64 array
+def neighbors_batch(indexes, k: int):
+    st_idxs = tile_coords_batch(indexes, k)
+    neighbor_st_idxs = st_idxs[:, np.newaxis, :] + np.array(NEIGHBOR_OFFSETS)
+    return tile_index_batch(neighbor_st_idxs.reshape(-1, 2), k).reshape(-1, 6)
+
+
+# The lines of the tiles st_idxs, an (N, 2) array of tiles all within tiling
+# k in the order they're drawn, with every line two of them share taken only
+# once, from whichever of the two comes first. Returns the row into st_idxs
+# and the line idx of each line as two int64 arrays, ordered by row.
+def tiling_edges(st_idxs, k: int):
+    st_idxs = np.asarray(st_idxs, dtype=np.int64).reshape(-1, 2)
+    rows = np.arange(len(st_idxs))
+    indexes = tile_index_batch(st_idxs, k)
+    index_to_row = np.full(tile_count(k), -1, dtype=np.int64)
+    index_to_row[indexes] = rows
+
+    neighbor_indexes = neighbors_batch(indexes, k)
+    neighbor_rows = np.where(neighbor_indexes >= 0, index_to_row[neighbor_indexes], -1)
+    owned = (neighbor_rows < 0) | (neighbor_rows > rows[:, np.newaxis])
+    return np.nonzero(owned)
+
+
+# The tiles which two tilings have in common, only in the old one, and only in
+# the new one, as lists of (s_idx, bot_t_idx, top_t_idx) inclusive ranges with
+# at most one range per column for kept and two for removed and added. Since
+# the bounds only ever grow with k these come straight from column_bounds.
+def tiling_diff(old_k: int, new_k: int):
+    kept = []
+    removed = []
+    added = []
+
+    def bounds(s_idx, k):
+        if -4 * k <= s_idx <= 4 * k:
+            return column_bounds(s_idx, k)
+        return (0, -1)
+
+    max_k = max(old_k, new_k)
+    for s_idx in range(-4 * max_k, 4 * max_k + 1):
+        old_bot, old_top = bounds(s_idx, old_k)
+        new_bot, new_top = bounds(s_idx, new_k)
+        bot = max(old_bot, new_bot)
+        top = min(old_top, new_top)
+
+        if bot > top:
+            if old_bot <= old_top:
+                removed.append((s_idx, old_bot, old_top))
+            if new_bot <= new_top:
+                added.append((s_idx, new_bot, new_top))
+            continue
+
+        kept.append((s_idx, bot, top))
+        for (res, other_bot, other_top) in ((removed, old_bot, old_top), (added, new_bot, new_top)):
+            if other_bot < bot:
+                res.append((s_idx, other_bot, bot - 1))
+            if other_top > top:
+                res.append((s_idx, top + 1, other_top))
+
+    return (kept, removed, added)
+
+
+def iter_tile_ranges(ranges):
+    for (s_idx, bot, top) in ranges:
+        for t_idx in range(bot, top + 1):
+            yield (s_idx, t_idx)
+
+
+# the corners of a tile relative to its center in thirds of L, in the same
+# order as UNIT_CORNERS_ST
+TILE_CORNERS_THIRDS = ((-1, 2), (1, 1), (2, -1), (1, -2), (-1, -1), (-2, 1))
+
+
+# For each of the six corners, the inclusive range of t_idx in column s_idx
+# for which that corner is within the outer hexagon. In lattice units the
+# outer hexagon is |t - s| <= q, |2t + s| <= q and |t + 2s| <= q; the corners
+# sit on thirds of L, so everything is scaled by 3 to stay in integers.
+def column_vertex_bounds(s_idx: int, k: int):
+    q3 = 18 * k
+    res = []
+    for (ds, dt) in TILE_CORNERS_THIRDS:
+        s3 = 3 * s_idx + ds
+        # coef * t_idx + offset must be within [-q3, q3]
+        constraints = ((3, dt - s3), (6, 2 * dt + s3), (3, dt + 2 * s3))
+        res.append((
+            max(-((q3 + offset) // coef) for (coef, offset) in constraints),
+            min((q3 - offset) // coef for (coef, offset) in constraints)
+        ))
+    return res
+
+
+# Splits column s_idx into the interior tiles, which are the inclusive range
+# (interior_bot, interior_top) and may be empty, and the boundary tiles, as
+# a list of (t_idx, outside) where outside[idx] is True when line idx of the
+# tile has an end outside the outer hexagon.
+def column_boundary(s_idx: int, k: int):
+    bot, top = column_bounds(s_idx, k)
+    vertex_bounds = column_vertex_bounds(s_idx, k)
+    interior_bot = max(bot, *[lo for (lo, _) in vertex_bounds])
+    interior_top = min(top, *[hi for (_, hi) in vertex_bounds])
+
+    if interior_bot > interior_top:
+        boundary_t_idxs = range(bot, top + 1)
+    else:
+        boundary_t_idxs = [*range(bot, interior_bot), *range(interior_top + 1, top + 1)]
+
+    boundary = []
+    for t_idx in boundary_t_idxs:
+        inside = [lo <= t_idx <= hi for (lo, hi) in vertex_bounds]
+        boundary.append((t_idx, tuple(not (inside[idx] and inside[(idx + 1) % 6]) for idx in range(6))))
+
+    return (interior_bot, interior_top, boundary)
+
+
+# yields (s_idx, interior_bot, interior_top, boundary) for every column, see
+# column_boundary
+def tiling_boundary(k: int):
+    for s_idx in range(-4 * k, 4 * k + 1):
+        yield (s_idx, *column_boundary(s_idx, k))
+
+
+# column_boundary as an (N, 6) bool array over the whole tiling, row i being
+# the outside flags for the lines of the tile with index i
+def tiling_outside_edges(k: int):
+    res = np.zeros((tile_count(k), 6), dtype=bool)
+    for (s_idx, _, _, boundary) in tiling_boundary(k):
+        first = column_offset(s_idx, k) - column_bounds(s_idx, k)[0]
+        for (t_idx, outside) in boundary:
+            res[first + t_idx] = outside
+    return res
@@ -0,0 +1,70 @@
+import numpy as np
+
+from .geometry import INV_BASIS
+from .indexing import contains_tile, tile_index, tile_index_batch
+
+
+# Rounds fractional lattice coordinates (in multiples of L along s and t) to
+# the center of the tile containing them. Neighboring tiles are along s, t
+# and t - s, so this is the usual cube rounding on (a, -a - b, b).
+def round_lattice(a: float, b: float) -> tuple:
+    c = -a - b
+    ra, rb, rc = round(a), round(b), round(c)
+    da, db, dc = abs(ra - a), abs(rb - b), abs(rc - c)
+
+    if da > db and da > dc:
+        ra = -rb - rc
+    elif db > dc:
+        rb = -ra - rc
+
+    return (int(ra), int(rb))
+
+
+# round_lattice for an (M, 2) array of fractional lattice coordinates,
+# returning an (M, 2) int64 array of tile coordinates
+def round_lattice_batch(ab):
+    a = ab[:, 0]
+    b = ab[:, 1]
+    c = -a - b
+    ra, rb, rc = np.rint(a), np.rint(b), np.rint(c)
+    da, db, dc = np.abs(ra - a), np.abs(rb - b), np.abs(rc - c)
+
+    fix_a = (da > db) & (da > dc)
+    fix_b = ~fix_a & (db > dc)
+
+    res = np.empty(ab.shape, dtype=np.int64)
+    res[:, 0] = np.where(fix_a, -rb - rc, ra)
+    res[:, 1] = np.where(fix_b, -ra - rc, rb)
+    return res
+
+
+# Finds the tile containing the xy point for the current k of the tracker.
+# Returns (s_idx, t_idx, index, outside), where index is -1 if that tile
+# isn't part of the tiling and outside is True if the point isn't within the
+# outer hexagon.
+def locate_point(point, k_tracker):
+    L = k_tracker.get_L()
+    k = int(k_tracker.get_k())
+    s, t = INV_BASIS @ np.asarray(point, dtype=float)[:2]
+
+    s_idx, t_idx = round_lattice(s / L, t / L)
+    index = tile_index(s_idx, t_idx, k) if contains_tile(s_idx, t_idx, k) else -1
+    inside, _ = k_tracker.within_outer_hexagon((s, t, 0))
+    return (s_idx, t_idx, index, not inside[0])
+
+
+# locate_point for an (M, 2) array of xy points in one pass. Returns the
+# (M, 2) tile coordinates, the (M,) tile indices (-1 where not part of the
+# tiling) and the (M,) mask of points outside the outer hexagon.
+def locate_points(points, k_tracker):
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    L = k_tracker.get_L()
+    k = int(k_tracker.get_k())
+
+    st = np.zeros((points.shape[0], 3))
+    st[:, :2] = points @ INV_BASIS.T
+
+    st_idxs = round_lattice_batch(st[:, :2] / L)
+    indexes = tile_index_batch(st_idxs, k)
+    inside, _ = k_tracker.within_outer_hexagon(st)
+    return (st_idxs, indexes, ~inside)
@@ -0,0 +1,111 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from .indexing import (
+    TileStore, column_bounds, column_boundary, column_offset,
+    tile_coords_batch, tile_count, tile_vertices, tiling_columns
+)
+
+# the arrays of a tiling as (attribute, dtype, shape per tile)
+SHARED_ARRAYS = (
+    ('st_idxs', np.int64, (2,)),
+    ('outside', np.bool_, (6,)),
+    ('_vertices', np.float64, (6, 3))
+)
+
+
+def attach_arrays(shms, count):
+    return [
+        np.ndarray((count, *shape), dtype=dtype, buffer=shm.buf)
+        for (shm, (_, dtype, shape)) in zip(shms, SHARED_ARRAYS)
+    ]
+
+
+# Fills in the tiles of the columns first_s_idx <= s_idx < stop_s_idx straight
+# into the shared memory blocks with the given names; runs in a worker.
+def fill_columns(names, k: int, radius: float, first_s_idx: int, stop_s_idx: int):
+    shms = [shared_memory.SharedMemory(name=name) for name in names]
+    try:
+        st_idxs, outside, vertices = attach_arrays(shms, tile_count(k))
+        start = column_offset(first_s_idx, k)
+        stop = column_offset(stop_s_idx, k) if stop_s_idx <= 4 * k else tile_count(k)
+
+        st_idxs[start:stop] = tile_coords_batch(np.arange(start, stop), k)
+        vertices[start:stop] = tile_vertices(st_idxs[start:stop], radius / (6 * k))
+        outside[start:stop] = False
+        for s_idx in range(first_s_idx, stop_s_idx):
+            first = column_offset(s_idx, k) - column_bounds(s_idx, k)[0]
+            for (t_idx, flags) in column_boundary(s_idx, k)[2]:
+                outside[first + t_idx] = flags
+
+        del st_idxs, outside, vertices
+    finally:
+        for shm in shms:
+            shm.close()
+
+
+# Splits the columns into at most num_chunks runs of consecutive s_idx with
+# roughly the same number of tiles each, as (first_s_idx, stop_s_idx) pairs.
+def column_chunks(k: int, num_chunks: int):
+    s_idxs, bots, tops = tiling_columns(k)
+    ends = np.cumsum(tops - bots + 1)
+    targets = ends[-1] * np.arange(1, num_chunks) / num_chunks
+    cuts = [0, *np.unique(np.searchsorted(ends, targets) + 1).tolist(), s_idxs.shape[0]]
+    return [
+        (int(s_idxs[0]) + first, int(s_idxs[0]) + stop)
+        for (first, stop) in zip(cuts, cuts[1:])
+        if first < stop
+    ]
+
+
+# A TileStore built by a pool of processes, each filling in a chunk of columns
+# directly in shared memory so nothing is pickled back. The arrays (including
+# the vertices) live in the shared memory blocks until close is called.
+class SharedTileStore(TileStore):
+    __slots__ = ('shms',)
+
+    def __init__(self, k: int, radius: float, workers: int = None, chunks_per_worker: int = 4):
+        if workers is None:
+            workers = os.cpu_count() or 1
+
+        self.k = k
+        self.radius = radius
+        count = tile_count(k)
+        self.shms = [
+            shared_memory.SharedMemory(create=True, size=max(1, count * np.dtype(dtype).itemsize * int(np.prod(shape))))
+            for (_, dtype, shape) in SHARED_ARRAYS
+        ]
+
+        try:
+            names = [shm.name for shm in self.shms]
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = [
+                    executor.submit(fill_columns, names, k, radius, first_s_idx, stop_s_idx)
+                    for (first_s_idx, stop_s_idx) in column_chunks(k, workers * chunks_per_worker)
+                ]
+                for future in futures:
+                    future.result()
+        except BaseException:
+            self.close()
+            raise
+
+        for ((attr, _, _), arr) in zip(SHARED_ARRAYS, attach_arrays(self.shms, count)):
+            setattr(self, attr, arr)
+
+    def close(self):
+        self.st_idxs = None
+        self.outside = None
+        self._vertices = None
+        for shm in self.shms:
+            shm.close()
+            shm.unlink()
+        self.shms = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
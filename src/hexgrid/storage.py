@@ -0,0 +1,127 @@
+import numpy as np
+
+from .geometry import BASIS
+from .indexing import iter_tile_chunks, tile_count, tile_vertices, tiling_boundary, tiling_columns
+
+# A tiling file is the header below followed by the column tables (bottom
+# t_idx, top t_idx and the index of the first tile, one int64 per column in
+# order of s_idx = -4k, ..., 4k), the (N, 6, 3) float64 vertices and the
+# (N, 6) bool outside flags, each section starting on a SECTION_ALIGN byte
+# boundary. Everything is little endian.
+MAGIC = b'HEXTILES'
+VERSION = 1
+SECTION_ALIGN = 64
+HEADER = np.dtype([
+    ('magic', 'S8'),
+    ('version', '<u4'),
+    ('k', '<u4'),
+    ('radius', '<f8'),
+    ('basis', '<f8', (2, 2)),
+    ('count', '<u8'),
+    ('columns', '<u8')
+])
+
+
+def align(offset: int) -> int:
+    return -(-offset // SECTION_ALIGN) * SECTION_ALIGN
+
+
+# the (dtype, shape, offset) of every section for a tiling with this k
+def tiling_file_layout(k: int) -> dict:
+    columns = 8 * k + 1
+    count = tile_count(k)
+
+    res = {}
+    offset = align(HEADER.itemsize)
+    for (name, dtype, shape) in (
+        ('bots', '<i8', (columns,)),
+        ('tops', '<i8', (columns,)),
+        ('starts', '<i8', (columns,)),
+        ('vertices', '<f8', (count, 6, 3)),
+        ('outside', '?', (count, 6))
+    ):
+        res[name] = (np.dtype(dtype), shape, offset)
+        offset = align(offset + np.dtype(dtype).itemsize * int(np.prod(shape)))
+
+    res['size'] = offset
+    return res
+
+
+# Writes the tiling for k to path, computing the vertices chunk_size tiles at
+# a time straight into the file so the whole tiling is never in memory.
+def write_tiling_file(path, k: int, radius: float, chunk_size: int = 1 << 20):
+    layout = tiling_file_layout(k)
+    with open(path, 'wb') as f:
+        f.truncate(layout['size'])
+
+    header = np.zeros(1, dtype=HEADER)
+    header['magic'] = MAGIC
+    header['version'] = VERSION
+    header['k'] = k
+    header['radius'] = radius
+    header['basis'] = BASIS
+    header['count'] = tile_count(k)
+    header['columns'] = 8 * k + 1
+    np.memmap(path, dtype=HEADER, mode='r+', shape=(1,))[:] = header
+
+    def section(name):
+        dtype, shape, offset = layout[name]
+        return np.memmap(path, dtype=dtype, mode='r+', offset=offset, shape=shape)
+
+    _, bots, tops = tiling_columns(k)
+    heights = tops - bots + 1
+    for (name, values) in (('bots', bots), ('tops', tops), ('starts', np.cumsum(heights) - heights)):
+        arr = section(name)
+        arr[:] = values
+        arr.flush()
+
+    inner_radius = radius / (6 * k)
+    vertices = section('vertices')
+    for (start, st_idxs) in iter_tile_chunks(k, chunk_size):
+        vertices[start:start + st_idxs.shape[0]] = tile_vertices(st_idxs, inner_radius)
+    vertices.flush()
+
+    # the file starts zeroed, so only the boundary tiles need writing
+    outside = section('outside')
+    starts = section('starts')
+    for (s_idx, _, _, boundary) in tiling_boundary(k):
+        col = s_idx + 4 * k
+        for (t_idx, flags) in boundary:
+            outside[starts[col] + t_idx - bots[col]] = flags
+    outside.flush()
+
+
+# A tiling written by write_tiling_file, memory mapped read-only so that
+# looking at a tile only touches the pages it's on.
+class TilingFile:
+    def __init__(self, path):
+        header = np.fromfile(path, dtype=HEADER, count=1)
+        if header.shape[0] != 1 or header['magic'][0] != MAGIC:
+            raise ValueError(f'{path} is not a tiling file')
+        if header['version'][0] != VERSION:
+            raise ValueError(f'{path} is tiling file version {header["version"][0]}, expected {VERSION}')
+
+        self.path = path
+        self.k = int(header['k'][0])
+        self.radius = float(header['radius'][0])
+        self.basis = header['basis'][0].copy()
+
+        layout = tiling_file_layout(self.k)
+        for name in ('bots', 'tops', 'starts', 'vertices', 'outside'):
+            dtype, shape, offset = layout[name]
+            setattr(self, name, np.memmap(path, dtype=dtype, mode='r', offset=offset, shape=shape))
+
+    def __len__(self) -> int:
+        return self.vertices.shape[0]
+
+    def tile_index(self, s_idx: int, t_idx: int) -> int:
+        col = s_idx + 4 * self.k
+        if not 0 <= col < self.bots.shape[0] or not self.bots[col] <= t_idx <= self.tops[col]:
+            raise ValueError(f'({s_idx}, {t_idx}) is not part of the tiling for k={self.k}')
+        return int(self.starts[col] + t_idx - self.bots[col])
+
+    def tile_coords(self, index: int) -> tuple:
+        if not 0 <= index < len(self):
+            raise IndexError(f'tile index {index} out of range for k={self.k}')
+        col = int(np.searchsorted(self.starts, index, side='right')) - 1
+        return (col - 4 * self.k, int(self.bots[col] + index - self.starts[col]))
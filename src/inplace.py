@@ -0,0 +1,86 @@
+from manim import DOWN, LEFT, ORIGIN, RIGHT, Brace, Line, normalize
+import numpy as np
+
+# Updaters which move the mobject they're attached to, instead of building a
+# new one every frame and deep copying it in with become(). The mobject keeps
+# its style, its updaters and its place in the scene.
+
+
+# the path width below which Brace squeezes its tips rather than shortening
+# the straight parts between them; Brace's default_min_width
+BRACE_MIN_WIDTH = 0.90552
+
+
+# Puts an existing straight Line on new endpoints.
+def move_line(line, start, end):
+    line.set_points_by_ends(
+        np.asarray(start, dtype=float), np.asarray(end, dtype=float), buff=line.buff, path_arc=line.path_arc
+    )
+    return line
+
+
+def move_dot(dot, point):
+    return dot.move_to(np.asarray(point, dtype=float))
+
+
+# endpoints() returns the (start, end) the line should be on this frame.
+def line_updater(endpoints):
+    def updater(x):
+        return move_line(x, *endpoints())
+
+    return updater
+
+
+# position() returns where the dot should be this frame.
+def dot_updater(position):
+    def updater(x):
+        return move_dot(x, position())
+
+    return updater
+
+
+# A Brace which is built once and then moved along a line every frame. Brace
+# only lengthens the straight parts between its three tips as it gets wider,
+# so every point of a horizontal brace under a line of width w centred on the
+# origin is template + (w - 1) * template_slope. Placing it on a line is then
+# that plus the rotation and shift which take the horizontal line onto it.
+class ParametricBrace(Brace):
+    def __init__(self, line, direction=DOWN, **kwargs):
+        super().__init__(Line(LEFT / 2, RIGHT / 2), direction=DOWN, **kwargs)
+        self.template = self.points.copy()
+        self.template_slope = Brace(Line(LEFT, RIGHT), direction=DOWN, **kwargs).points - self.template
+        self.template_kwargs = kwargs
+        self.sharpness = kwargs.get('sharpness', 2)
+        self.brace_direction = normalize(np.asarray(direction, dtype=float))
+        self.follow(line)
+
+    # Moves the brace onto the line from start to end, on its direction side.
+    def put_along(self, start, end, direction=None):
+        if direction is not None:
+            self.brace_direction = normalize(np.asarray(direction, dtype=float))
+        d = self.brace_direction
+        a = np.array([-d[1], d[0], 0.0])
+        start = np.asarray(start, dtype=float)
+        end = np.asarray(end, dtype=float)
+
+        width = abs(np.dot(end - start, a))
+        if width * self.sharpness >= BRACE_MIN_WIDTH:
+            local = self.template + (width - 1) * self.template_slope
+        else:
+            local = Brace(Line(LEFT * width / 2, RIGHT * width / 2), direction=DOWN, **self.template_kwargs).points
+
+        origin = np.dot(start + end, a) / 2 * a + max(np.dot(start, d), np.dot(end, d)) * d
+        self.set_points(origin + np.outer(local[:, 0], a) - np.outer(local[:, 1], d))
+        return self
+
+    def follow(self, line, direction=None):
+        return self.put_along(line.get_start(), line.get_end(), direction)
+
+    # An updater which keeps a label at the tip of this brace; the label is
+    # moved, not rebuilt.
+    def label_updater(self, shift=ORIGIN):
+        def updater(x):
+            self.put_at_tip(x)
+            return x.shift(shift)
+
+        return updater
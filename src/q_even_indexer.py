@@ -1,8 +1,18 @@
 from manim import *
-from transformed_hexagon_math import TransformedHexagon, BASIS, INV_BASIS
+from transformed_hexagon_math import TransformedHexagon
+from hexgrid import (
+    KTracker, TilingCache, hexagon_vertices, iter_tile_ranges,
+    tile_count, tile_index_batch, tiling_diff, tiling_edges
+)
+from tex_cache import TexPrepassScene, install_tex_cache
 import math
 
-class QEvenIndexer(Scene):
+install_tex_cache()
+
+class QEvenIndexer(TexPrepassScene):
+    # how tile lines crossing the outer hexagon are drawn, see TilingMobject
+    tile_clip = 'drop'
+
     def construct(self):
         self.radius = 4 / math.sqrt(3)
         self.height = math.sqrt(3) * self.radius
@@ -30,258 +40,221 @@ class QEvenIndexer(Scene):
 
     def show_indexes(self, outer_hexagon):
         vals = WrappedKTracker(self.radius, 1)
+        tilings = TilingCache()
 
-        hexes_by_st_coord = {}
-        needed_hexes = set()
-        ctr = 0
-        hex_grow_anims = []
+        tiling_mobj = TilingMobject(vals, clip=self.tile_clip, tilings=tilings)
+        self.add(tiling_mobj)
+        labels = []
 
-        def add_hexes(s_idx, top_t, bot_t, dry_run=False, label=None):
-            nonlocal ctr
+        def add_all_hexes(group_size=1, anim_speed=1, label=None):
             if label is None:
                 label = int(vals.get_k()) == 1
 
-            top_t_idx = round_toward_zero(top_t / vals.get_L())
-            bot_t_idx = round_toward_zero(bot_t / vals.get_L())
-
-            for t_idx in range(bot_t_idx, top_t_idx + 1):
-                if dry_run:
-                    needed_hexes.add((s_idx, t_idx))
-                    continue
-
-                # the set is strictly for when reusing hexes in animations; NOT
-                # required for getting unique (s_idx, t_idx) pairs otherwise
-                if (s_idx, t_idx) in hexes_by_st_coord:
-                    hex = hexes_by_st_coord[(s_idx, t_idx)]
-                    if label:
-                        hex.create_label(str(ctr))
-                        hex_grow_anims.append([GrowFromCenter(hex.label)])
-                    ctr += 1
-                    continue
-
-                hex = InnerTransformedHexagon(s_idx, t_idx, vals)
-                hexes_by_st_coord[(s_idx, t_idx)] = hex
+            tiling = tilings.get(int(vals.get_k()), vals.radius)
+            is_new = tiling_mobj.add_tiles(tiling.st_idxs, int(vals.get_k()))
+            # tiles which are already drawn only need their label grown
+            entries = np.flatnonzero(is_new | label).tolist()
+
+            for start_idx in range(0, len(entries), group_size):
+                group = entries[start_idx:start_idx + group_size]
+                anims = []
+                created = int(is_new[group].sum())
+                if created:
+                    anims.append(CreateTiles(tiling_mobj, created))
                 if label:
-                    hex.create_label(str(ctr))
-                    hex_grow_anims.append([*[Create(line) for line in hex.lines], GrowFromCenter(hex.label)])
-                else:
-                    hex_grow_anims.append([Create(line) for line in hex.lines])
-
-                ctr += 1
-
-        def add_all_hexes(group_size=1, anim_speed=1, dry_run=False, label=None):
-            for s_idx in range(int(-vals.get_k() * 4), int(-vals.get_k() * 2) + 1):
-                s = s_idx * vals.get_L()
-                top_t = vals.get_q() * vals.get_L() + s
-                bot_t = -vals.get_q() * vals.get_L() - 2 * s
-                add_hexes(s_idx, top_t, bot_t, dry_run=dry_run, label=label)
-
-            for s_idx in range(int(-vals.get_k() * 2) + 1, int(vals.get_k() * 2) + 1):
-                s = s_idx * vals.get_L()
-                top_t = (vals.get_q() * vals.get_L() - s) / 2
-                bot_t = -(vals.get_q() * vals.get_L() + s) / 2
-                add_hexes(s_idx, top_t, bot_t, dry_run=dry_run, label=label)
-
-            for s_idx in range(int(vals.get_k() * 2) + 1, int(vals.get_k() * 4) + 1):
-                s = s_idx * vals.get_L()
-                top_t = vals.get_q() * vals.get_L() - 2 * s
-                bot_t = -vals.get_q() * vals.get_L() + s
-                add_hexes(s_idx, top_t, bot_t, dry_run=dry_run, label=label)
-
-            for start_idx in range(0, len(hex_grow_anims), group_size):
-                arrs = hex_grow_anims[start_idx:start_idx + group_size]
-                merged = []
-                for arr in arrs:
-                    merged.extend(arr)
-                self.play(*merged, run_time=1 / anim_speed)
-
-            hex_grow_anims.clear()
+                    for index in group:
+                        labels.append(tiling_mobj.create_label(*tiling.st_idxs[index].tolist(), index))
+                        anims.append(GrowFromCenter(labels[-1]))
+                self.play(*anims, run_time=1 / anim_speed)
 
         def hide_labels():
-            anims = [ShrinkToCenter(hex.label) for hex in hexes_by_st_coord.values() if hex.label is not None]
-            if not anims:
+            if not labels:
                 return
-            self.play(*anims)
-            for hex in hexes_by_st_coord.values():
-                hex.label = None
+            self.play(*[ShrinkToCenter(label) for label in labels])
+            self.remove(*labels)
+            labels.clear()
 
         for idx, k in enumerate([1, 2, 3, 1]):
-            if hexes_by_st_coord:
+            if len(tiling_mobj.st_idxs):
                 hide_labels()
-                needed_hexes.clear()
-                old_k = vals.get_k()
-                vals.k_tracker.set_value(k)
-                add_all_hexes(dry_run=True)
-                vals.k_tracker.set_value(old_k)
+                _, removed, _ = tiling_diff(int(vals.get_k()), k)
 
-                anims = []
-                new_hexes_by_st_coord = {}
-                for coord, hex in hexes_by_st_coord.items():
-                    if coord not in needed_hexes:
-                        for line in hex.lines:
-                            anims.append(ShrinkToCenter(line))
-                    else:
-                        new_hexes_by_st_coord[coord] = hex
-
-                if anims:
-                    self.play(*anims)
-                    hexes_by_st_coord = new_hexes_by_st_coord
-
-                og_hexes = tuple(hexes_by_st_coord.values())
-                for hex in og_hexes:
-                    hex.add_updaters()
+                removed_mobj = tiling_mobj.remove_tiles(list(iter_tile_ranges(removed)))
+                if removed_mobj is not None:
+                    self.play(ShrinkTiles(removed_mobj))
+
+                tiling_mobj.add_updater(TilingMobject.update_edges)
                 self.play(vals.k_tracker.animate.set_value(k))
-                for hex in og_hexes:
-                    hex.remove_updaters()
+                tiling_mobj.remove_updater(TilingMobject.update_edges)
 
-            ctr = 0
             add_all_hexes(anim_speed=4 * k, group_size=k, label=idx == 0)
             self.wait()
 
-        anims = []
-        for coord, hex in hexes_by_st_coord.items():
-            for line in hex.lines:
-                anims.append(ShrinkToCenter(line))
-
-        self.play(*anims)
+        self.play(ShrinkTiles(tiling_mobj))
 
 
-class WrappedKTracker:
+class WrappedKTracker(KTracker):
     def __init__(self, radius, initial_value=1):
-        self.radius = radius
-        self.canonical_outer_hexagon = TransformedHexagon(ORIGIN, self.radius)
-        self.canonical_outer_normals = self.calc_canonical_outer_normals()
+        super().__init__(radius, initial_value)
         self.k_tracker = ValueTracker(initial_value)
 
-    def calc_canonical_outer_normals(self):
-        res = []
-        for idx in range(6):
-            start = self.canonical_outer_hexagon.vertices[idx]
-            end = self.canonical_outer_hexagon.vertices[(idx+1) % 6]
-
-            halfway = (start + end) / 2
-            unit_v = end - start
-            unit_v /= np.linalg.norm(unit_v)
-
-            norm_v = np.cross(np.cross(unit_v, -halfway), unit_v)
-            norm_v /= np.linalg.norm(norm_v)
-
-            res.append((halfway, norm_v))
-
-        return res
-
-
     def get_value(self) -> float:
         return self.k_tracker.get_value()
 
-    def get_k(self) -> float:
-        return self.get_value()
-
-    def get_q(self) -> float:
-        return self.get_k() * 6
-
-    def get_inner_radius(self) -> float:
-        return self.radius / self.get_q()
-
-    def get_inner_height(self) -> float:
-        return (math.sqrt(3)/2) * self.get_inner_radius()
-
-    def get_L(self) -> float:
-        return math.sqrt(3) * self.get_inner_radius()
-
-
-class InnerTransformedHexagon:
-    def __init__(self, s_idx: int, t_idx: int, k_tracker: WrappedKTracker):
-        self.s_idx = s_idx
-        self.t_idx = t_idx
+    def set_value(self, value):
+        self.k_tracker.set_value(value)
+
+
+# Every line of a set of tiles as a single VMobject, with each line that two
+# tiles share drawn once (see tiling_edges). Lines with an end outside the
+# outer hexagon are never drawn at all: with clip 'drop' they're left out, and
+# with 'exact' they're cut at the boundary. The tiles are kept in the order
+# they're drawn: the first drawn are fully shown, the next growing are part
+# way through CreateTiles, and the rest aren't shown yet. Each line is its own
+# subpath, and all of them are recomputed at once by update_edges, for the
+# current k. At whole k which lines are outside comes from the TileStore of
+# that tiling (see tiling_outside_edges) rather than testing every vertex.
+class TilingMobject(VMobject):
+    def __init__(self, k_tracker, clip='drop', tilings=None, **kwargs):
+        assert clip in ('drop', 'exact')
+        super().__init__(**kwargs)
         self.k_tracker = k_tracker
-        self.updaters = []
-
-        self.lines = self.canonical_lines()
-        self.label = None
-
-    @property
-    def center(self):
-        return np.array([self.s_idx * self.k_tracker.get_L(), self.t_idx * self.k_tracker.get_L(), 0])
-
-    @property
-    def radius(self):
-        return self.k_tracker.get_inner_radius()
-
-    @property
-    def vertices(self):
-        center = self.center
-        radius = self.radius
-        center_xy = BASIS @ center[:2]
-
-        res = []
-        for angle in range(0, 360, 60):
-            coord_xy = np.array((center_xy[0] + radius * math.cos(angle * DEGREES), center_xy[1] + radius * math.sin(angle * DEGREES)))
-            coord_st = INV_BASIS @ coord_xy
-            res.append(np.array([coord_st[0], coord_st[1], 0]))
+        self.clip = clip
+        self.tilings = TilingCache() if tilings is None else tilings
+        self.k = 1
+        self.st_idxs = np.zeros((0, 2), dtype=np.int64)
+        self.edge_rows = np.zeros(0, dtype=np.int64)
+        self.edge_lines = np.zeros(0, dtype=np.int64)
+        # (k, outside flags of the edges) for the last whole k, see edge_outside
+        self.outside = (None, None)
+        self.drawn = 0
+        self.growing = 0
+        self.grow_alpha = 1.0
+        self.edge_scale = 1.0
+
+    def set_tiles(self, st_idxs, drawn):
+        self.st_idxs = st_idxs
+        self.drawn = drawn
+        self.edge_rows, self.edge_lines = tiling_edges(self.st_idxs, self.k)
+        self.outside = (None, None)
+        return self.update_edges()
+
+    # Appends the tiles of st_idxs which aren't already here, undrawn; they
+    # must all be within tiling k. Returns which of st_idxs were new.
+    def add_tiles(self, st_idxs, k: int):
+        self.k = max(self.k, k)
+        present = np.zeros(tile_count(self.k), dtype=bool)
+        present[tile_index_batch(self.st_idxs, self.k)] = True
+        is_new = ~present[tile_index_batch(st_idxs, self.k)]
+
+        self.set_tiles(np.concatenate([self.st_idxs, st_idxs[is_new]]), self.drawn)
+        return is_new
+
+    # Takes the given (s_idx, t_idx) tiles out; returns a new, fully drawn
+    # TilingMobject of just those tiles, or None if none of them were here.
+    def remove_tiles(self, st_idxs):
+        if not st_idxs:
+            return None
+
+        removed = np.zeros(tile_count(self.k), dtype=bool)
+        removed[tile_index_batch(st_idxs, self.k)] = True
+        is_removed = removed[tile_index_batch(self.st_idxs, self.k)]
+        if not is_removed.any():
+            return None
+
+        res = TilingMobject(self.k_tracker, clip=self.clip, tilings=self.tilings).match_style(self)
+        res.k = self.k
+        res.set_tiles(self.st_idxs[is_removed], int(is_removed.sum()))
+        self.set_tiles(self.st_idxs[~is_removed], int(np.count_nonzero(~is_removed[:self.drawn])))
         return res
 
-    def vertex_within_outer_hexagon(self, vert):
-        for (halfway, norm) in self.k_tracker.canonical_outer_normals:
-            if np.dot(vert - halfway, norm) < -1e-6:
-                return False
-
-        return True
-
-    @property
-    def visual_center(self):
-        return np.average(
-            np.array([
-                *[
-                    vert for vert in self.vertices
-                    if self.vertex_within_outer_hexagon(vert)
-                ],
-                self.center
-            ]),
-            0
-        )
-
-    def canonical_line(self, idx, verts=None):
-        verts = verts or self.vertices
-        line = Line(verts[idx], verts[(idx + 1) % 6])
-        if not self.vertex_within_outer_hexagon(line.get_start()) or not self.vertex_within_outer_hexagon(line.get_end()):
-            line.fade(1)
-        return line
-
-    def canonical_lines(self):
-        verts = self.vertices
-        return [self.canonical_line(idx, verts=verts) for idx in range(6)]
-
-    def children(self):
-        return self.lines.copy()
-
-    def create_line_updater(self, idx):
-        def updater(x):
-            return x.become(self.canonical_line(idx))
-
-        return updater
-
-    def add_updaters(self):
-        assert not self.updaters
-
-        for (idx, line) in enumerate(self.lines):
-            self.updaters.append([line, self.create_line_updater(idx)])
-
-        for (mobj, upd) in self.updaters:
-            mobj.add_updater(upd)
-
-    def remove_updaters(self):
-        for (mobj, upd) in self.updaters:
-            mobj.remove_updater(upd)
-        self.updaters = []
-
-    def create_label(self, idx: int) -> MathTex:
-        self.label = MathTex(str(idx)).scale(0.5).shift(self.visual_center)
-        return self.label
-
-
-def round_toward_zero(x: float) -> int:
-    if abs(x - int(x)) == 0.5:
-        return int(x)
+    # Whether each edge has an end outside the outer hexagon, taken from the
+    # analytic flags of tiling k when k is a whole number and every tile is
+    # part of that tiling; None otherwise, e.g. part way through the k
+    # animation.
+    def edge_outside(self):
+        k = float(self.k_tracker.get_k())
+        if not k.is_integer():
+            return None
+
+        if self.outside[0] != k:
+            indexes = tile_index_batch(self.st_idxs, int(k))
+            outside = None
+            if (indexes >= 0).all():
+                tiling = self.tilings.get(int(k), self.k_tracker.radius)
+                outside = tiling.outside[indexes[self.edge_rows], self.edge_lines]
+            self.outside = (k, outside)
+        return self.outside[1]
+
+    def update_edges(self):
+        verts = self.k_tracker.tile_vertices(self.st_idxs)
+        rows = self.edge_rows
+        starts = verts[rows, self.edge_lines]
+        ends = verts[rows, (self.edge_lines + 1) % 6]
+
+        outside = self.edge_outside()
+        if outside is None:
+            inside, _ = self.k_tracker.within_outer_hexagon(verts.reshape(-1, 3))
+            inside = inside.reshape(-1, 6)
+            outside = ~(inside[rows, self.edge_lines] & inside[rows, (self.edge_lines + 1) % 6])
+
+        shown = ~outside
+        if self.clip == 'exact' and outside.any():
+            # lines with both ends inside are inside as a whole
+            starts[outside], ends[outside], shown[outside] = self.k_tracker.clip_to_outer_hexagon(
+                starts[outside], ends[outside]
+            )
+
+        shown &= rows < self.drawn + self.growing
+        rows = rows[shown]
+        starts = starts[shown]
+        deltas = ends[shown] - starts
+
+        deltas *= np.where(rows < self.drawn, 1.0, self.grow_alpha)[:, np.newaxis]
+        if self.edge_scale != 1:
+            starts += deltas * (1 - self.edge_scale) / 2
+            deltas *= self.edge_scale
+
+        thirds = np.array([0, 1 / 3, 2 / 3, 1])[np.newaxis, :, np.newaxis]
+        self.set_points((starts[:, np.newaxis, :] + thirds * deltas[:, np.newaxis, :]).reshape(-1, 3))
+        return self
+
+    # the index of a tile, at the average of its center and those of its
+    # vertices within the outer hexagon
+    def create_label(self, s_idx: int, t_idx: int, idx: int) -> MathTex:
+        center = np.array([s_idx, t_idx, 0]) * self.k_tracker.get_L()
+        verts = hexagon_vertices(center[:2], self.k_tracker.get_inner_radius())[0]
+        inside, _ = self.k_tracker.within_outer_hexagon(verts)
+        visual_center = np.average(np.array([*verts[inside], center]), 0)
+        return MathTex(str(idx)).scale(0.5).shift(visual_center)
+
+
+# Draws the next count undrawn tiles of a TilingMobject, every line of them
+# growing from its start at once, like Create on each of them would.
+class CreateTiles(Animation):
+    def __init__(self, tiling_mobj: TilingMobject, count: int, **kwargs):
+        self.count = count
+        super().__init__(tiling_mobj, **kwargs)
+
+    def interpolate_mobject(self, alpha: float) -> None:
+        self.mobject.growing = self.count
+        self.mobject.grow_alpha = self.rate_func(alpha)
+        self.mobject.update_edges()
+
+    def finish(self) -> None:
+        super().finish()
+        self.mobject.drawn += self.count
+        self.mobject.growing = 0
+        self.mobject.grow_alpha = 1.0
+
+
+# Shrinks every line of a TilingMobject to its own center, like ShrinkToCenter
+# on each of them would, and then takes it out of the scene.
+class ShrinkTiles(Animation):
+    def __init__(self, tiling_mobj: TilingMobject, **kwargs):
+        super().__init__(tiling_mobj, remover=True, **kwargs)
+
+    def interpolate_mobject(self, alpha: float) -> None:
+        self.mobject.edge_scale = 1 - self.rate_func(alpha)
+        self.mobject.update_edges()
 
-    return round(x)
@@ -0,0 +1,131 @@
+import argparse
+import hashlib
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from importlib import metadata
+from pathlib import Path
+
+from sources import SRC_DIR, local_sources, source_name
+
+# (module, scene) in the order they appear in the final video
+SCENES = (
+    ('basic_hexagon', 'BasicHexagon'),
+    ('adv_hexagon', 'AdvancedHexagon'),
+    ('transformed_hexagon_math', 'TransformedHexagonMath'),
+    ('q_even_indexer', 'QEvenIndexer'),
+)
+
+# manim's quality flags and the folder each one renders into
+QUALITIES = {
+    'l': '480p15',
+    'm': '720p30',
+    'h': '1080p60',
+    'p': '1440p60',
+    'k': '2160p60',
+}
+
+
+def scene_output(module, scene, quality):
+    return Path('media', 'videos', module, QUALITIES[quality], f'{scene}.mp4')
+
+
+def manim_version():
+    try:
+        return metadata.version('manim')
+    except metadata.PackageNotFoundError:
+        return 'unknown'
+
+
+# A hash of everything that decides what a scene renders to: its source and
+# the local helpers it imports, the quality and the manim version.
+def scene_hash(module, scene, quality):
+    digest = hashlib.sha256()
+    for part in (scene, quality, manim_version()):
+        digest.update(part.encode('utf-8') + b'\0')
+    for path in local_sources(SRC_DIR / f'{module}.py'):
+        digest.update(source_name(path).encode('utf-8') + b'\0')
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def hash_file(output):
+    return SRC_DIR / output.with_name(output.name + '.sha256')
+
+
+# Renders one scene in its own manim process, unless its last render is still
+# up to date; returns the wall time taken, or None if it was reused.
+def render_scene(module, scene, quality, force=False, tex_prepass=False):
+    output = scene_output(module, scene, quality)
+    current = scene_hash(module, scene, quality)
+    if not force and (SRC_DIR / output).is_file() and hash_file(output).is_file():
+        if hash_file(output).read_text().strip() == current:
+            return None
+
+    start = time.perf_counter()
+    with tempfile.TemporaryDirectory() as config_dir:
+        # manim checks for and then writes its .tex, .dvi and .svg files in
+        # tex_dir without any locking, so each process gets a tex_dir of its
+        # own; tex_cache.TexCache is what scenes share their tex through
+        config_file = Path(config_dir, 'manim.cfg')
+        config_file.write_text(f'[CLI]\ntex_dir = {{media_dir}}/Tex/{scene}\n')
+        subprocess.run(
+            [sys.executable, '-m', 'manim', '--config_file', str(config_file), f'-q{quality}', f'{module}.py', scene],
+            cwd=SRC_DIR, check=True, stdout=subprocess.DEVNULL,
+            # see tex_cache.TexPrepassScene
+            env={**os.environ, 'TEX_PREPASS': '1' if tex_prepass else '0'}
+        )
+    hash_file(output).write_text(current + '\n')
+    return time.perf_counter() - start
+
+
+# Joins the rendered scenes in order without re-encoding them.
+def stitch(outputs, out_file):
+    with tempfile.TemporaryDirectory() as concat_dir:
+        concat = Path(concat_dir, 'concat.txt')
+        concat.write_text(''.join(f"file '{(SRC_DIR / output).as_posix()}'\n" for output in outputs))
+        subprocess.run(
+            ['ffmpeg', '-y', '-loglevel', 'error', '-f', 'concat', '-safe', '0', '-i', str(concat),
+             '-c', 'copy', str(out_file)],
+            cwd=SRC_DIR, check=True
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Render every scene in parallel and stitch them into one video.')
+    parser.add_argument('-q', '--quality', choices=QUALITIES, default='h')
+    parser.add_argument('-j', '--jobs', type=int, default=len(SCENES))
+    parser.add_argument('-o', '--out', default=Path('media', 'videos', 'out.mp4'), type=Path)
+    parser.add_argument('-f', '--force', action='store_true', help='re-render scenes even if they are unchanged')
+    parser.add_argument('--tex-prepass', action='store_true', help='compile each scene\'s tex in parallel before rendering it')
+    args = parser.parse_args(argv)
+
+    total_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.jobs) as executor:
+        futures = [
+            (scene, executor.submit(render_scene, module, scene, args.quality, args.force, args.tex_prepass))
+            for (module, scene) in SCENES
+        ]
+
+        failed = False
+        for (scene, future) in futures:
+            try:
+                elapsed = future.result()
+                print(f'{scene:<24}   cached' if elapsed is None else f'{scene:<24} {elapsed:8.1f}s')
+            except subprocess.CalledProcessError as e:
+                print(f'{scene:<24}   failed ({e.returncode})')
+                failed = True
+
+    if failed:
+        return 1
+
+    stitch([scene_output(module, scene, args.quality) for (module, scene) in SCENES], args.out)
+    print(f'{"total":<24} {time.perf_counter() - total_start:8.1f}s -> {args.out}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
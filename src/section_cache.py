@@ -0,0 +1,99 @@
+from manim import __version__ as manim_version
+from manim import config, logger
+from sources import local_sources, source_name
+from tex_cache import TexPrepassScene
+from pathlib import Path
+import hashlib
+import inspect
+import shutil
+import subprocess
+import sys
+
+
+# A scene whose construct is split into sections, one per method named in
+# cached_sections, which are rendered and cached on their own. Each section is
+# keyed by the source of its method chained onto the key of the one before,
+# so editing a step re-renders it and everything after it. Sections still in
+# the cache are run with their animations skipped, which brings the scene's
+# mobjects and trackers to the state they're in at the next boundary without
+# rendering any frames, and the final movie is stitched from the cached
+# section videos.
+class CachedSectionScene(TexPrepassScene):
+    cached_sections = ()
+
+    def __init__(self, *args, **kwargs):
+        # the per section videos are what gets cached
+        config.save_sections = True
+        super().__init__(*args, **kwargs)
+        self.section_key = self.base_section_key()
+        # section name -> key, in the order they were started
+        self.section_keys = {}
+
+    # Everything outside the cached steps: the rest of the scene's module,
+    # every local module it imports (the same ones render.py hashes), and the
+    # render settings; a change to any of it invalidates every section. The
+    # module is found through its file, as manim may have loaded it under any
+    # name (e.g. py, or src.adv_hexagon), and each step is left out of the
+    # file it's defined in, which may be a base class's.
+    def base_section_key(self):
+        module_file = Path(inspect.getsourcefile(sys.modules[type(self).__module__])).resolve()
+        steps = [getattr(type(self), name) for name in self.cached_sections]
+
+        settings = (
+            type(self).__name__, manim_version, config.pixel_width, config.pixel_height, config.frame_rate,
+            config.background_color, config.background_opacity, config.movie_file_extension
+        )
+        digest = hashlib.sha256()
+        for part in settings:
+            digest.update(str(part).encode('utf-8') + b'\0')
+
+        for path in local_sources(module_file):
+            source = path.read_text(encoding='utf-8')
+            for step in steps:
+                if Path(inspect.getsourcefile(step)).resolve() == path:
+                    source = source.replace(inspect.getsource(step), '')
+            digest.update(source_name(path).encode('utf-8') + b'\0')
+            digest.update(source.encode('utf-8') + b'\0')
+        return digest.hexdigest()
+
+    def section_cache_path(self, key):
+        return Path(config.media_dir) / 'section_cache' / f'{key}.mp4'
+
+    # Starts the section for the step with the given name; call it right
+    # before running the step, and before the first animation of construct.
+    def cached_section(self, name):
+        if name not in self.cached_sections:
+            raise ValueError(f'{name} is not one of {type(self).__name__}.cached_sections')
+
+        digest = hashlib.sha256(self.section_key.encode('utf-8'))
+        digest.update(inspect.getsource(getattr(type(self), name)).encode('utf-8'))
+        self.section_key = digest.hexdigest()
+        self.section_keys[name] = self.section_key
+
+        cached = not config.dry_run and self.section_cache_path(self.section_key).is_file()
+        if cached:
+            logger.info(f'reusing cached section {name}')
+        self.next_section(name, skip_animations=cached)
+
+    def render(self, preview=False):
+        super().render(preview)
+        if config.dry_run or not self.section_keys:
+            return
+
+        writer = self.renderer.file_writer
+        for section in writer.sections:
+            if section.video is not None and section.name in self.section_keys:
+                key = self.section_keys[section.name]
+                self.section_cache_path(key).parent.mkdir(parents=True, exist_ok=True)
+                shutil.copyfile(Path(writer.sections_output_dir) / section.video, self.section_cache_path(key))
+
+        # sections without any animations never produce a video
+        videos = [self.section_cache_path(key) for key in self.section_keys.values()]
+        videos = [video for video in videos if video.is_file()]
+        concat = self.section_cache_path(self.section_key).with_suffix('.txt')
+        concat.write_text(''.join(f"file '{video.resolve().as_posix()}'\n" for video in videos))
+        subprocess.run(
+            ['ffmpeg', '-y', '-loglevel', 'error', '-f', 'concat', '-safe', '0', '-i', str(concat),
+             '-c', 'copy', str(writer.movie_file_path)],
+            check=True
+        )
@@ -0,0 +1,53 @@
+import ast
+import os
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parent
+
+
+# Finds the file behind an import in src, or None if it's not one of ours.
+def local_module_file(name, level=0, importer=None):
+    base = importer.parent if level else SRC_DIR
+    for _ in range(level - 1):
+        base = base.parent
+
+    path = base.joinpath(*name.split('.')) if name else base
+    for candidate in (path.with_suffix('.py'), path / '__init__.py'):
+        if candidate.is_file():
+            return candidate
+    return None
+
+
+# Every source file in src that the file at path imports, directly or through
+# other local modules, including that file itself; it doesn't have to be in
+# src, or be importable under its file name.
+def local_sources(path):
+    pending = [Path(path).resolve()]
+    found = set()
+    while pending:
+        path = pending.pop()
+        if path in found:
+            continue
+        found.add(path)
+
+        for node in ast.walk(ast.parse(path.read_bytes())):
+            if isinstance(node, ast.Import):
+                imported = [local_module_file(alias.name) for alias in node.names]
+            elif isinstance(node, ast.ImportFrom):
+                imported = [local_module_file(node.module, node.level, path)]
+                # from package import submodule
+                imported += [
+                    local_module_file(f'{node.module}.{alias.name}' if node.module else alias.name, node.level, path)
+                    for alias in node.names
+                ]
+            else:
+                continue
+            pending += [file.resolve() for file in imported if file is not None]
+
+    return sorted(found)
+
+
+# The name a source file is hashed under: its path relative to src, so hashes
+# don't depend on where the repo is checked out.
+def source_name(path):
+    return Path(os.path.relpath(path, SRC_DIR)).as_posix()
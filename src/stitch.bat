@@ -1 +0,0 @@
-ffmpeg -f concat -i concat.txt -c copy media/videos/out.mp4
@@ -0,0 +1,74 @@
+import math
+import random
+
+import numpy as np
+import pytest
+
+from hexgrid import (
+    KTracker, column_offset, iter_tiles, tile_coords, tile_coords_batch, tile_count, tile_index,
+    tile_index_batch, tile_vertices, tiling_outside_edges, tiling_st_idxs
+)
+
+RADIUS = 4 / math.sqrt(3)
+
+
+# Every tile of tiling k in index order, found by brute force: the lattice
+# points whose center is within the outer hexagon, |t - s| <= q,
+# |2t + s| <= q and |t + 2s| <= q in lattice units, column by column from
+# the bottom up.
+def enumerate_tiles(k):
+    q = 6 * k
+    return [
+        (s_idx, t_idx)
+        for s_idx in range(-q, q + 1)
+        for t_idx in range(-q, q + 1)
+        if abs(t_idx - s_idx) <= q and abs(2 * t_idx + s_idx) <= q and abs(t_idx + 2 * s_idx) <= q
+    ]
+
+
+@pytest.mark.parametrize('k', range(1, 30))
+def test_rank_unrank_match_enumeration(k):
+    tiles = enumerate_tiles(k)
+    assert tile_count(k) == len(tiles)
+    assert list(iter_tiles(k)) == tiles
+    assert tiling_st_idxs(k).tolist() == [list(tile) for tile in tiles]
+
+    for (index, (s_idx, t_idx)) in enumerate(tiles):
+        assert tile_index(s_idx, t_idx, k) == index
+        assert tile_coords(index, k) == (s_idx, t_idx)
+
+    offsets = {}
+    for (index, (s_idx, _)) in enumerate(tiles):
+        offsets.setdefault(s_idx, index)
+    assert all(column_offset(s_idx, k) == offset for (s_idx, offset) in offsets.items())
+
+    st_idxs = np.array(tiles, dtype=np.int64)
+    assert (tile_index_batch(st_idxs, k) == np.arange(len(tiles))).all()
+    assert (tile_coords_batch(np.arange(len(tiles)), k) == st_idxs).all()
+
+
+@pytest.mark.parametrize('k', [1, 2, 7, 1000, 123457, 10 ** 6])
+def test_rank_unrank_round_trip(k):
+    rng = random.Random(k)
+    count = tile_count(k)
+    indexes = [0, count - 1, *[rng.randrange(count) for _ in range(1000)]]
+
+    coords = [tile_coords(index, k) for index in indexes]
+    assert [tile_index(s_idx, t_idx, k) for (s_idx, t_idx) in coords] == indexes
+    assert tile_coords_batch(indexes, k).tolist() == [list(coord) for coord in coords]
+    assert tile_index_batch(coords, k).tolist() == indexes
+
+
+def test_tile_index_batch_outside():
+    assert tile_index_batch([(0, 7), (-5, 0), (4, -4), (0, 3)], 1).tolist() == [-1, -1, -1, tile_index(0, 3, 1)]
+
+
+# the outside flags must match the float test the scenes used to draw with
+@pytest.mark.parametrize('k', range(1, 12))
+def test_outside_edges_match_float_test(k):
+    verts = tile_vertices(tiling_st_idxs(k), RADIUS / (6 * k))
+    inside, _ = KTracker(RADIUS, k).within_outer_hexagon(verts.reshape(-1, 3))
+    inside = inside.reshape(-1, 6)
+
+    expected = ~(inside & np.roll(inside, -1, axis=1))
+    assert (tiling_outside_edges(k) == expected).all()
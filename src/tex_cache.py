@@ -0,0 +1,193 @@
+from manim import Scene, config, logger, tempconfig
+from manim.renderer.cairo_renderer import CairoRenderer
+from manim.utils import tex_file_writing
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import hashlib
+import os
+import shutil
+import tempfile
+
+try:
+    from manim.mobject.text import tex_mobject
+except ImportError:
+    # before manim 0.16
+    from manim.mobject.svg import tex_mobject
+
+# set to 1 to have TexPrepassScene run its pre-pass (see render.py --tex-prepass)
+TEX_PREPASS_ENV = 'TEX_PREPASS'
+
+# stands in for every uncached tex while recording which ones a scene needs
+PLACEHOLDER_SVG = '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 10 10"><path d="M0 0 L10 0 L10 10 Z"/></svg>'
+
+
+# A content addressed cache of compiled tex, keyed by the full tex source
+# (expression, environment and template) and the compiler settings, which
+# keeps the resulting svg files in one directory shared by every scene and
+# run. Files are touched on every hit and the least recently used ones are
+# removed once the directory grows past max_bytes. Misses are compiled in a
+# private temporary directory rather than manim's tex_dir, which would keep
+# every .tex, .dvi and .svg forever, so the cache is the only copy kept.
+class TexCache:
+    def __init__(self, directory=None, max_bytes=256 * 1024 * 1024):
+        if directory is None:
+            directory = os.path.join(config.media_dir, 'tex_cache')
+
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        # while recording, maps key -> (expression, environment, tex_template)
+        self.pending = None
+
+    def tex_code(self, expression, environment=None, tex_template=None):
+        if tex_template is None:
+            tex_template = config.tex_template
+
+        if environment is None:
+            return tex_template.get_texcode_for_expression(expression)
+        return tex_template.get_texcode_for_expression_in_env(expression, environment)
+
+    def key(self, expression, environment=None, tex_template=None):
+        if tex_template is None:
+            tex_template = config.tex_template
+
+        code = self.tex_code(expression, environment, tex_template)
+        return hashlib.sha256(
+            '\0'.join((tex_template.tex_compiler, tex_template.output_format, code)).encode('utf-8')
+        ).hexdigest()
+
+    def path(self, key):
+        return self.directory / f'{key}.svg'
+
+    def get(self, key):
+        path = self.path(key)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def put(self, key, svg_file):
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        # other renders may be writing the same key at the same time
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        os.close(fd)
+        shutil.copyfile(svg_file, tmp_path)
+        os.replace(tmp_path, self.path(key))
+
+        self.evict()
+        return self.path(key)
+
+    def evict(self):
+        entries = []
+        for path in self.directory.glob('*.svg'):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for (_, size, _) in entries)
+        for (_, size, path) in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+    def tex_to_svg_file(self, expression, environment=None, tex_template=None):
+        key = self.key(expression, environment, tex_template)
+        path = self.get(key)
+        if path is not None:
+            self.hits += 1
+            return path
+
+        if self.pending is not None:
+            self.pending[key] = (expression, environment, tex_template)
+            return self.placeholder()
+
+        self.misses += 1
+        return self.compile(key, expression, environment, tex_template)
+
+    # Compiles the tex the same way manim does, but in a directory of its own
+    # which is removed afterwards, and puts the resulting svg in the cache.
+    def compile(self, key, expression, environment=None, tex_template=None):
+        if tex_template is None:
+            tex_template = config.tex_template
+
+        with tempfile.TemporaryDirectory() as tex_dir:
+            tex_file = Path(tex_dir, f'{key}.tex')
+            tex_file.write_text(self.tex_code(expression, environment, tex_template), encoding='utf-8')
+
+            command = tex_file_writing.tex_compilation_command(
+                tex_template.tex_compiler, tex_template.output_format, tex_file.as_posix(), Path(tex_dir).as_posix()
+            )
+            if os.system(command) != 0:
+                log = tex_file.with_suffix('.log').read_text(encoding='utf-8', errors='replace')
+                errors = '\n'.join(line for line in log.splitlines() if line.startswith('!'))
+                raise ValueError(f'{tex_template.tex_compiler} failed to compile {expression!r}:\n{errors}')
+
+            dvi_file = tex_file.with_suffix(tex_template.output_format).as_posix()
+            return self.put(key, tex_file_writing.convert_to_svg(dvi_file, tex_template.output_format))
+
+    def placeholder(self):
+        # kept in a subdirectory so evict never counts or removes it
+        path = self.directory / 'placeholder' / 'placeholder.svg'
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(PLACEHOLDER_SVG)
+        return path
+
+    # Runs through the scene without rendering, with every uncached tex
+    # swapped for a placeholder, to find all the tex it needs; then compiles
+    # those concurrently. Returns how many were compiled. If the run fails,
+    # the error is raised rather than starting the real render on a cache
+    # that may be half warm.
+    def prewarm(self, scene_class, workers=None):
+        if self.pending is not None:
+            # this is the recording run itself
+            return 0
+
+        self.pending = {}
+        try:
+            with tempconfig({'dry_run': True}):
+                scene_class(renderer=CairoRenderer(skip_animations=True)).render()
+        finally:
+            pending, self.pending = self.pending, None
+
+        with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+            list(executor.map(lambda args: self.tex_to_svg_file(*args), pending.values()))
+
+        return len(pending)
+
+    def stats(self) -> dict:
+        return {'hits': self.hits, 'misses': self.misses}
+
+
+TEX_CACHE = None
+
+
+# Routes every MathTex / Tex compile through the shared TexCache; safe to call
+# from every scene module.
+def install_tex_cache(**kwargs) -> TexCache:
+    global TEX_CACHE
+    if TEX_CACHE is None:
+        TEX_CACHE = TexCache(**kwargs)
+        tex_mobject.tex_to_svg_file = TEX_CACHE.tex_to_svg_file
+    return TEX_CACHE
+
+
+# A scene which can compile all of its tex up front, in parallel, before
+# construct runs. The pre-pass runs construct one extra time, so it's off
+# unless the TEX_PREPASS environment variable is 1; it's worth it for a cold
+# cache, not for re-renders.
+class TexPrepassScene(Scene):
+    tex_prepass_workers = None
+
+    def setup(self):
+        super().setup()
+        if os.environ.get(TEX_PREPASS_ENV) == '1':
+            compiled = install_tex_cache().prewarm(type(self), workers=self.tex_prepass_workers)
+            if compiled:
+                logger.info(f'compiled {compiled} tex strings for {type(self).__name__} up front')
@@ -1,14 +1,14 @@
 from manim import *
+from hexgrid import hexagon_vertices
+from inplace import ParametricBrace, move_line
+from tex_cache import TexPrepassScene, install_tex_cache
 import math
 
-BASIS = np.array([
-    [0, math.cos(30 * DEGREES)],
-    [1, math.sin(30 * DEGREES)]
-])
-INV_BASIS = np.linalg.inv(BASIS)
+install_tex_cache()
+
 NEON_GREEN = '#39ff14'
 
-class TransformedHexagonMath(Scene):
+class TransformedHexagonMath(TexPrepassScene):
     def construct(self):
         self.radius = 4 / math.sqrt(3)
 
@@ -389,27 +389,22 @@ class TransformedHexagonMath(Scene):
         def calculate_top(s):
             return calculate_along(top_start, top_end, s)
 
-        h_line = Line()
+        h_line = Line().set_color(NEON_GREEN)
         def h_line_updater(x):
             s = s_tracker.get_value()
             bottom = calculate_bottom(s)
             top = calculate_top(s)
 
-            return x.become(Line([s, bottom, 0], [s, top, 0]).set_color(NEON_GREEN))
+            return move_line(x, [s, bottom, 0], [s, top, 0])
 
         h_line_updater(h_line)
 
-        h_brace = Brace(h_line)
+        h_brace = ParametricBrace(h_line, h_brace_dir).set_color(NEON_GREEN)
         def h_brace_updater(x):
-            return x.become(Brace(h_line_updater(Line()), h_brace_dir).set_color(NEON_GREEN))
-
-        h_brace_updater(h_brace)
+            return x.follow(h_line)
 
         h_tex = MathTex(r'\text{height}(s)').set_color(NEON_GREEN)
-        def h_tex_updater(x):
-            x_cp = x.copy()
-            h_brace_updater(Brace(Line())).put_at_tip(x_cp)
-            return x.become(x_cp.shift(h_tex_shift))
+        h_tex_updater = h_brace.label_updater(h_tex_shift)
 
         h_tex_updater(h_tex)
 
@@ -525,14 +520,7 @@ class TransformedHexagon:
             self.texs = []
 
     def calc_vertices(self):
-        center_xy = BASIS @ self.center[:2]
-
-        res = []
-        for angle in range(0, 360, 60):
-            coord_xy = np.array((center_xy[0] + self.radius * math.cos(angle * DEGREES), center_xy[1] + self.radius * math.sin(angle * DEGREES)))
-            coord_st = INV_BASIS @ coord_xy
-            res.append(np.array([coord_st[0], coord_st[1], 0]))
-        return res
+        return list(hexagon_vertices(self.center[:2], self.radius)[0])
 
     def children(self):
         return [*self.lines, *self.dots, *self.texs]
@@ -563,3 +551,4 @@ class TransformedHexagon:
                 self.vertices
             )
         ]
+